@@ -13,18 +13,34 @@ The public API:
   Derives a 32‑byte key from the two salts.
 * ``decrypt_frame(data: bytes, key: bytes, iv: bytes) -> bytes`` –
   Decrypts a single frame using ChaCha20.
-
-The module depends on the ``cryptography`` package.
+* ``decrypt_header(data, key) -> bytes`` –
+  Decrypts only the header and compressed sizes table of a file.
+* ``decrypt_many(blocks, key, key_ids) -> Iterator[bytes]`` –
+  Decrypts a sequence of frames lazily.
+* ``decrypt_frames(data, key, sizes, base, first_key_id=0) -> bytearray`` –
+  Decrypts a run of consecutive frame blocks into one contiguous buffer.
+* ``decompress_chunked(data) -> bytearray`` –
+  Inflates a zlib stream in cache-sized chunks without copying the input.
+
+The module depends on the ``cryptography`` and ``numpy`` packages.
 """
 
 from __future__ import annotations
+import functools
+import hashlib
+import logging
+import mmap
+import os
 from pathlib import Path
+from typing import Iterable, Iterator
 import zlib
 
-from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+import numpy as np
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
 from cryptography.hazmat.backends import default_backend
 
+log = logging.getLogger(__name__)
+
 # 32‑byte constant passphrase extracted from the binary
 PASS_PHRASE = (
     b"\x90\x37\x9B\x41\xBB\xFD\x51\x9D"
@@ -41,8 +57,43 @@ SCRYPT_N = 0x4000  # 16384
 SCRYPT_R = 8
 SCRYPT_P = 1
 KEY_LEN = 32  # 32‑byte key
+# scrypt works in 128 * r * N bytes (16 MiB) plus bookkeeping, allow twice that
+SCRYPT_MAXMEM = 128 * SCRYPT_R * SCRYPT_N * 2
+
+# Plain 16-byte header at the start of the file, before the zlib sizes table
+HEADER_SIZE = 16
+# key_id of the header and sizes table; frame blocks use their frame index
+HEADER_KEY_ID = 0xFFFFFFFF
+
+# Feed zlib streams in pieces that stay cache resident
+ZLIB_CHUNK_SIZE = 64 * 1024
+
+# Directory to cache derived keys in, keyed by SHA-256 of the salt. The files hold raw
+# keys, so the disk cache is opt-in, e.g. Path.home() / ".cache" / "alphastream" / "keys"
+KEY_CACHE_DIR: Path | None = None
+
+# Backend lookup is not free, resolve it once
+_BACKEND = default_backend()
+
 
+def _chacha20_decryptor(key: bytes, key_id: int):
+    """Create a ChaCha20 decryptor for the given key_id.
+
+    The 16‑byte IV is 12 zero bytes followed by key_id (little-endian uint32).
+    OpenSSL reads the first 4 bytes as the block counter and the last 12 as
+    the nonce, so key_id ends up in the nonce: keystreams of different
+    key_ids are unrelated and cannot be sliced from one long stream.
+    """
+    iv = b"\x00" * 12 + key_id.to_bytes(4, byteorder="little", signed=False)
+    cipher = Cipher(
+        algorithms.ChaCha20(key, iv),
+        mode=None,
+        backend=_BACKEND,
+    )
+    return cipher.decryptor()
 
+
+@functools.lru_cache(maxsize=64)
 def derive_key_from_salts(scene_id: int, version: bytes, base_url: bytes) -> bytes:
     """Derive a 32‑byte key from scene_id, version, and base_url substring.
 
@@ -64,24 +115,69 @@ def derive_key_from_salts(scene_id: int, version: bytes, base_url: bytes) -> byt
     -----
     The binary prepends the raw 4 bytes of scene_id (little-endian uint32) to the salt buffer,
     followed by version and base_url substring. This matches libalphastream.so's logic.
+
+    Scrypt is deliberately slow, so keys are memoized in-process, and on
+    disk in :data:`KEY_CACHE_DIR` when it is set.
     """
     scene_id_bytes = scene_id.to_bytes(4, byteorder="little", signed=False)
-    print(f"scene_id_bytes: {scene_id_bytes.hex()}")
     combined_salt = scene_id_bytes + version + base_url
-    print(f"combined_salt: {combined_salt}")
-    kdf = Scrypt(
+    key = _load_cached_key(combined_salt)
+    if key is not None:
+        return key
+    key = hashlib.scrypt(
+        PASS_PHRASE,
         salt=combined_salt,
-        length=KEY_LEN,
         n=SCRYPT_N,
         r=SCRYPT_R,
         p=SCRYPT_P,
-        backend=default_backend(),
+        dklen=KEY_LEN,
+        maxmem=SCRYPT_MAXMEM,
     )
-    return kdf.derive(PASS_PHRASE)
+    _store_cached_key(combined_salt, key)
+    return key
+
+
+def _key_cache_path(salt: bytes) -> Path | None:
+    if KEY_CACHE_DIR is None:
+        return None
+    return KEY_CACHE_DIR / hashlib.sha256(salt).hexdigest()
 
 
-def decrypt(data: bytes, key: bytes, key_id: int) -> bytes:
-    """Decrypt a frame using ChaCha20-Poly1305.
+def _load_cached_key(salt: bytes) -> bytes | None:
+    path = _key_cache_path(salt)
+    if path is None:
+        return None
+    try:
+        key = path.read_bytes()
+    except OSError:
+        return None
+    return key if len(key) == KEY_LEN else None
+
+
+def _store_cached_key(salt: bytes, key: bytes) -> None:
+    """Write the key to the disk cache atomically; the cache is best effort.
+
+    The directory and key files are only accessible to the current user.
+    """
+    path = _key_cache_path(salt)
+    if path is None:
+        return
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except OSError:
+        return
+    try:
+        with open(fd, "wb") as f:
+            f.write(key)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def decrypt(data: bytes, key: bytes, key_id: int, out: memoryview | None = None) -> bytes | memoryview:
+    """Decrypt a frame using ChaCha20.
 
     Parameters
     ----------
@@ -89,25 +185,100 @@ def decrypt(data: bytes, key: bytes, key_id: int) -> bytes:
         Ciphertext of the frame.
     key: bytes
         32‑byte key derived by :func:`derive_key_from_salts`.
-    iv: bytes
-        16‑byte IV (nonce) used by the binary.
+    key_id: int
+        Frame index, or 0xFFFFFFFF for the header and sizes table.
+    out: memoryview, optional
+        Writable buffer of ``len(data)`` bytes to decrypt into. Avoids
+        allocating a new ``bytes`` object for the plaintext.
+
+    Returns
+    -------
+    bytes | memoryview
+        Plaintext frame data, or ``out`` when it was given.
+    """
+    decryptor = _chacha20_decryptor(key, key_id)
+    # ChaCha20 is a stream cipher, finalize() never yields data
+    if out is None:
+        return decryptor.update(data)
+    decryptor.update_into(data, out)
+    return out
+
+
+def decrypt_header(data: bytes, key: bytes) -> bytes:
+    """Decrypt the header and compressed sizes table at the start of a file.
+
+    Both are one ChaCha20 stream under key_id 0xFFFFFFFF. The header is
+    decrypted first to learn the sizes table length (bytes 12..15), then the
+    same stream continues over exactly the sizes table. The frame blocks
+    that follow use their own key_ids and are not touched.
 
     Returns
     -------
     bytes
-        Plaintext frame data.
+        Plaintext header followed by the compressed sizes table.
     """
+    with memoryview(data) as view:
+        if len(view) < HEADER_SIZE:
+            raise ValueError("File too small for header")
+        decryptor = _chacha20_decryptor(key, HEADER_KEY_ID)
+        header = decryptor.update(view[:HEADER_SIZE])
+        compressed_data_size = int.from_bytes(header[12:16], byteorder="little", signed=False)
+        end = HEADER_SIZE + compressed_data_size
+        if len(view) < end:
+            raise ValueError("Data shorter than header+sizes table")
+        return header + decryptor.update(view[HEADER_SIZE:end])
+
+
+def decrypt_many(blocks: Iterable[bytes], key: bytes, key_ids: Iterable[int]) -> Iterator[bytes]:
+    """Decrypt a sequence of blocks, pairing each block with its key_id.
+
+    Yields the plaintext of each block in order.
+    """
+    for block, key_id in zip(blocks, key_ids):
+        yield decrypt(block, key, key_id)
 
-    iv = b"\x00" * 12 + key_id.to_bytes(4, byteorder="little", signed=False)
 
+def decrypt_frames(data: bytes, key: bytes, sizes: list[int], base: int, first_key_id: int = 0) -> bytearray:
+    """Decrypt consecutive frame blocks into one contiguous buffer.
 
-    cipher = Cipher(
-        algorithms.ChaCha20(key, iv),
-        mode=None,
-        backend=default_backend(),
-    )
-    decryptor = cipher.decryptor()
-    return decryptor.update(data) + decryptor.finalize()
+    Frame ``i`` starts at ``base + sum(sizes[:i])`` and is decrypted with
+    key_id ``first_key_id + i``. Each frame is decrypted straight into its
+    slot of a single pre-allocated buffer, avoiding a temporary ``bytes``
+    object per frame.
+
+    Parameters
+    ----------
+    data: bytes
+        The whole encrypted file (or any buffer with the same layout).
+    key: bytes
+        32‑byte key derived by :func:`derive_key_from_salts`.
+    sizes: list[int]
+        Encrypted size of each frame block, in file order.
+    base: int
+        Offset of the first frame block in ``data``.
+    first_key_id: int, optional
+        Frame index of the first block, for decrypting a run of frames
+        that does not start at frame 0.
+
+    Returns
+    -------
+    bytearray
+        Plaintext of the frame blocks, concatenated in file order.
+    """
+    total = sum(sizes)
+    if base + total > len(data):
+        raise ValueError("Frame blocks exceed data length")
+    out = bytearray(total)
+    # release every view explicitly; data may be an mmap, which cannot be
+    # closed while a view held by a traceback still points into it
+    with memoryview(data)[base:base + total] as src, memoryview(out) as dst:
+        offset = 0
+        for key_id, size in enumerate(sizes, first_key_id):
+            end = offset + size
+            with src[offset:end] as block:
+                decrypt(block, key, key_id, out=dst[offset:end])
+            offset = end
+    return out
 
 def is_zlib_compressed(data: bytes) -> bool:
     """Check if the given data is zlib-compressed.
@@ -116,6 +287,25 @@ def is_zlib_compressed(data: bytes) -> bool:
     """
     return len(data) >= 2 and data[0] == 0x78 and data[1] in (0x01, 0x9C, 0xDA)
 
+def decompress_chunked(data: bytes) -> bytearray:
+    """Decompress a zlib stream by feeding it in ``ZLIB_CHUNK_SIZE`` pieces.
+
+    The input is walked through a memoryview, so no copy of the compressed
+    data is made, and output accumulates in a single ``bytearray``. Data after
+    the end of the stream is ignored, like :func:`zlib.decompress` does.
+    """
+    view = memoryview(data)
+    dec = zlib.decompressobj()
+    out = bytearray()
+    for start in range(0, len(view), ZLIB_CHUNK_SIZE):
+        out += dec.decompress(view[start:start + ZLIB_CHUNK_SIZE])
+        if dec.eof:
+            break
+    out += dec.flush()
+    if not dec.eof:
+        raise zlib.error("Incomplete or truncated zlib stream")
+    return out
+
 def parse_block(data: bytes) -> tuple[bytes, bytes, int]:
     """Parse a block of data
 
@@ -135,7 +325,7 @@ def parse_block(data: bytes) -> tuple[bytes, bytes, int]:
     # header is 16 bytes, payload is rest (8 bytes for magic, 4 bytes for number of frames in this block, 4 bytes for next block offset)
     next_block = data[12:16]
     next_block_offset = int.from_bytes(next_block, byteorder='little', signed=False)
-    payload = data[16:]
+    payload = memoryview(data)[16:]
     # decompress payload
     if not is_zlib_compressed(payload):
         raise ValueError("Payload is not zlib-compressed")
@@ -144,12 +334,13 @@ def parse_block(data: bytes) -> tuple[bytes, bytes, int]:
 
 class AlphaStream():
     HEADER_SIZE = 16
-    DUMP_DEBUG = True
+    # write the sizes table and every fetched frame next to the input file
+    DUMP_DEBUG = False
 
     header_raw: bytes
-    sizes_raw: bytes
+    sizes_raw: bytearray
     compressed_data_size: int
-    decrypted_data: bytes
+    decrypted_data: bytes  # header + compressed sizes table
     
     file_path: Path
     scene_id: int
@@ -157,9 +348,10 @@ class AlphaStream():
     base_url: bytes
 
     key: bytes
+    _mm: mmap.mmap
 
-    frame_offsets: list[int]
-    frame_sizes: list[int]
+    frame_offsets: np.ndarray
+    frame_sizes: np.ndarray
 
     def __init__(self, file_path: Path, scene_id: int, version: bytes, base_url: bytes):
         self.file_path = file_path
@@ -167,45 +359,51 @@ class AlphaStream():
         self.version = version
         self.base_url = base_url
 
+        # map the file instead of reading it, frames are sliced out of the map on demand
         with open(file_path, "rb") as f:
-            data = f.read()
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
         # decrypt the file
         self.key = derive_key_from_salts(scene_id, version, base_url)
         # iv appears hardcoded to 12 bytes of 0 + 4 bytes of 0xFFFFFFFF
         # self.iv = b"\x00" * 12 + (0xFFFFFFFF).to_bytes(4, byteorder="little", signed=False)
-        self.decrypted_data = decrypt(data, self.key, 0xFFFFFFFF)
-        print(f"Decrypted ASVR file size: {len(data)} bytes")
+        # only header + sizes table use that iv, frames are decrypted on demand
+        self.decrypted_data = decrypt_header(self._mm, self.key)
+        log.debug("Decrypted ASVR header and sizes table: %d of %d bytes", len(self.decrypted_data), len(self._mm))
 
         self._parse(self.decrypted_data)
 
+    def close(self):
+        """Release the file mapping."""
+        mm = getattr(self, "_mm", None)
+        if mm is not None and not mm.closed:
+            mm.close()
+
+    def __del__(self):
+        self.close()
+
     def _parse(self, data: bytes):
         self.header_raw = data[:self.HEADER_SIZE]
         self.compressed_data_size = int.from_bytes(self.header_raw[12:16], byteorder='little', signed=False)
 
-        if not is_zlib_compressed(data[self.HEADER_SIZE:]):
+        sizes_compressed = memoryview(data)[self.HEADER_SIZE:self.HEADER_SIZE + self.compressed_data_size]
+        if not is_zlib_compressed(sizes_compressed):
             raise ValueError("Payload is not zlib-compressed")
-        import zlib
-        self.sizes_raw = zlib.decompress(data[self.HEADER_SIZE:])
+        self.sizes_raw = decompress_chunked(sizes_compressed)
 
         if self.DUMP_DEBUG:
             with open(self.file_path.with_suffix('.sizes_dump.bin'), "wb") as f:
                 f.write(self.sizes_raw)
 
-        self.frame_offsets = []
-        self.frame_sizes = []
-        offset = 0
-        for i in range(0, len(self.sizes_raw), 8):
-            size = int.from_bytes(self.sizes_raw[i:i+8], byteorder='little', signed=False)
-            self.frame_sizes.append(size)
-            self.frame_offsets.append(offset)
-            offset += size
+        # sizes table is a packed array of u64 little-endian, offsets are its exclusive prefix sum
+        self.frame_sizes = np.frombuffer(self.sizes_raw, dtype='<u8')
+        self.frame_offsets = np.cumsum(self.frame_sizes) - self.frame_sizes
 
     def get_total_body_size(self) -> int:
-        return sum(self.frame_sizes)
+        return int(self.frame_sizes.sum())
     
     def get_total_file_size(self) -> int:
-        return sum(self.frame_sizes) + self.compressed_data_size + self.HEADER_SIZE
+        return self.get_total_body_size() + self.compressed_data_size + self.HEADER_SIZE
     
     def get_frame_data(self, frame_index: int):
         """Get the raw data of a specific frame by index.
@@ -215,13 +413,11 @@ class AlphaStream():
             raise IndexError("Frame index out of range")
         
         base = self.HEADER_SIZE + self.compressed_data_size
-        frame_offset = base + self.frame_offsets[frame_index]
-        frame_size = self.frame_sizes[frame_index]
+        frame_offset = base + int(self.frame_offsets[frame_index])
+        frame_size = int(self.frame_sizes[frame_index])
 
         # frame_data = self.decrypted_data[frame_offset:frame_offset+frame_size]
-        with open(self.file_path, "rb") as f:
-            f.seek(frame_offset)
-            frame_data = f.read(frame_size)
+        frame_data = memoryview(self._mm)[frame_offset:frame_offset+frame_size]
 
         key_id = frame_index
         test_decrypted = decrypt(frame_data, self.key, key_id)
@@ -229,7 +425,7 @@ class AlphaStream():
         first_4_bytes = test_decrypted[:4]
         zlib_data = test_decrypted[4:]
         uncompressed_length = int.from_bytes(first_4_bytes, byteorder='little', signed=False)
-        print(f"Frame {frame_index} uncompressed length: {uncompressed_length}")
+        log.debug("Frame %d uncompressed length: %d", frame_index, uncompressed_length)
         # rest is zlib-compressed data
         try:
             raw_frame = zlib.decompress(zlib_data)
@@ -242,7 +438,7 @@ class AlphaStream():
                     f.write(raw_frame)
             return raw_frame
         except zlib.error as ex:
-            print(f"Frame {frame_index} decompression failed after decryption", ex)
+            log.warning("Frame %d decompression failed after decryption: %s", frame_index, ex)
             return test_decrypted
 
     def parse_frame_data(self, data: bytes):
@@ -251,32 +447,27 @@ class AlphaStream():
         - first 4 bytes: number of words in header (N)
         - next N * 4 bytes: header words (uint32 little-endian), each word is a size in bytes into the payload
         - remaining bytes: records of sizes specified in the header
+
+        Records are returned as memoryviews into ``data``.
         """
         # first word is number of words in header
         num_header_words = int.from_bytes(data[:4], byteorder='little', signed=False)
         header_size = num_header_words * 4  # bytes
-        header = data[4:4+header_size]
         # parse header as list of uint32
-        header_words = []
-        for i in range(0, len(header), 4):
-            header_bytes = header[i:i+4]
-            word = int.from_bytes(header_bytes, byteorder='little', signed=False)
-            header_words.append(word)
-        payload = data[4+header_size:]
-        print(sum(header_words) + 4 + header_size == len(data))
-        # extract records from payload based on header words
-        records = []
-        offset = 0
-        for size in header_words:
-            record = payload[offset:offset+size]
-            records.append(record)
-            offset += size
+        header_words = np.frombuffer(data, dtype='<u4', count=num_header_words, offset=4).tolist()
+        payload = memoryview(data)[4+header_size:]
+        if sum(header_words) + 4 + header_size != len(data):
+            log.debug("Frame record sizes do not add up to the frame length %d", len(data))
+        # extract records from payload based on header words, as zero-copy views
+        ends = np.cumsum(header_words, dtype=np.int64).tolist()
+        records = [payload[end - size:end] for size, end in zip(header_words, ends)]
         return header_words, records
 
 # End of module
 
 # example input for testing
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
     # Example salt values from scene at https://deovr.com/be9ngg
     # to get test data, any video with "ai passthrough" is ok.
     # on In Dec 2025 we used scene 85342:
@@ -301,4 +492,4 @@ if __name__ == "__main__":
         frame_data = asvr.get_frame_data(inspect_frame_index)
         parsed_header, parsed_payload = asvr.parse_frame_data(frame_data)
         print(f"  Parsed header size: {len(parsed_header)} words, content: {parsed_header}...")
-        print(f"  Parsed payload size: {len(parsed_payload)} records, content: {parsed_payload[:1]}...")
\ No newline at end of file
+        print(f"  Parsed payload size: {len(parsed_payload)} records, content: {[bytes(record) for record in parsed_payload[:1]]}...")
\ No newline at end of file
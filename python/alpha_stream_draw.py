@@ -13,32 +13,75 @@ Usage:
 
 Dependencies:
 - Relies on AlphaStream from alpha_stream_crypto.py for decryption/parsing.
-- Requires Pillow: pip install pillow
+- Requires Pillow and numpy: pip install pillow numpy
+- Optionally uses numba to compile the line drawing kernels: pip install numba
+- Optionally uses the ahead-of-time compiled alpha_stream_draw_c extension,
+  which avoids numba's first-call compile: python setup.py build_ext --inplace
 """
 from __future__ import annotations
-from typing import List, Tuple
+from typing import Tuple
 
+import numpy as np
 from PIL import Image
 
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional, kernels then run as plain Python
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+try:
+    from alpha_stream_draw_c import draw_record as _draw_record_c
+except ImportError:  # extension not built, use the kernels below
+    _draw_record_c = None
+
 from alpha_stream_crypto import AlphaStream
 
-# Bit lookup table like DAT_001175d0: [1,2,4,8,16,32,64,128]
-BIT_LOOKUP = bytes([1, 2, 4, 8, 16, 32, 64, 128])
+# Bit lookup table, MSB-first: [128,64,32,16,8,4,2,1]
+# The binary uses LSB-first (DAT_001175d0: [1,2,4,...,128]); MSB-first matches
+# Pillow's '1' mode so the mask needs no conversion to become an image.
+BIT_LOOKUP = bytes([128, 64, 32, 16, 8, 4, 2, 1])
+# Horizontal run masks, MSB-first: LEFT_MASK[b] sets bit b to the end of the
+# byte, RIGHT_MASK[b] sets the start of the byte through bit b.
+LEFT_MASK = bytes([0xFF >> b for b in range(8)])
+RIGHT_MASK = bytes([(0xFF << (7 - b)) & 0xFF for b in range(8)])
 
 
-def _set_pixel_bit(mask: bytearray, width: int, height: int, x: int, y: int) -> None:
+def _set_pixel_bit(mask: np.ndarray, width: int, height: int, x: int, y: int) -> None:
     """
-    Set a single pixel bit in row-major 1-bit buffer.
+    Set a single pixel bit in the (height, row_bytes) 1-bit mask.
     Equivalent to the bit setting in VIBRE_draw_line_on_mask.
     """
     if x < 0 or y < 0 or x >= width or y >= height:
         return
-    pixel_index = y * width + x
-    byte_index = pixel_index >> 3
-    bit_index = pixel_index & 7
-    mask[byte_index] |= BIT_LOOKUP[bit_index]
+    mask[y, x >> 3] |= BIT_LOOKUP[x & 7]
+
+
+# Compiled twin for use inside the kernels below; calling a jitted function
+# per pixel from Python costs more than the plain version.
+_set_pixel_bit_nb = njit(cache=True)(_set_pixel_bit)
+
+
+@njit(cache=True, boundscheck=False)
+def _fill_run(row: np.ndarray, x_start: int, x_end: int) -> None:
+    """
+    Set pixels x_start..x_end (inclusive) of a mask row a byte at a time:
+    partial bytes at either end via the run masks, whole bytes in between.
+    """
+    start_byte, start_bit = x_start >> 3, x_start & 7
+    end_byte, end_bit = x_end >> 3, x_end & 7
+    if start_byte == end_byte:
+        row[start_byte] |= LEFT_MASK[start_bit] & RIGHT_MASK[end_bit]
+        return
+    row[start_byte] |= LEFT_MASK[start_bit]
+    row[start_byte + 1:end_byte] = 0xFF
+    row[end_byte] |= RIGHT_MASK[end_bit]
 
 
+@njit(cache=True)
 def _liang_barsky_clip(x0: int, y0: int, x1: int, y1: int, width: int, height: int) -> Tuple[int, int, int, int, bool]:
     """
     Liang-Barsky line clipping to rectangle [0,width-1]x[0,height-1].
@@ -49,8 +92,8 @@ def _liang_barsky_clip(x0: int, y0: int, x1: int, y1: int, width: int, height: i
 
     dx = x1 - x0
     dy = y1 - y0
-    p = [-dx, dx, -dy, dy]
-    q = [x0 - x_min, x_max - x0, y0 - y_min, y_max - y0]
+    p = (-dx, dx, -dy, dy)
+    q = (x0 - x_min, x_max - x0, y0 - y_min, y_max - y0)
 
     u1, u2 = 0.0, 1.0
     for pi, qi in zip(p, q):
@@ -76,7 +119,8 @@ def _liang_barsky_clip(x0: int, y0: int, x1: int, y1: int, width: int, height: i
     return cx0, cy0, cx1, cy1, True
 
 
-def _draw_line(mask: bytearray, width: int, height: int, x0: int, y0: int, x1: int, y1: int) -> None:
+@njit(cache=True, boundscheck=False)
+def _draw_line(mask: np.ndarray, width: int, height: int, x0: int, y0: int, x1: int, y1: int) -> None:
     """
     Bresenham line drawing with clipping, mirrors VIBRE_draw_line_on_mask behavior.
     """
@@ -92,7 +136,7 @@ def _draw_line(mask: bytearray, width: int, height: int, x0: int, y0: int, x1: i
     err = dx - dy
 
     while True:
-        _set_pixel_bit(mask, width, height, x0, y0)
+        _set_pixel_bit_nb(mask, width, height, x0, y0)
         if x0 == x1 and y0 == y1:
             break
         e2 = 2 * err
@@ -104,76 +148,162 @@ def _draw_line(mask: bytearray, width: int, height: int, x0: int, y0: int, x1: i
             y0 += sy
 
 
-def _decode_record_to_points(record: bytes) -> List[Tuple[int, int]]:
+@njit(cache=True, boundscheck=False)
+def _draw_polyline(mask: np.ndarray, width: int, height: int, xs: np.ndarray, ys: np.ndarray) -> None:
+    """
+    Draw all segments of a polyline given as xs/ys coordinate arrays.
+    With numba the whole polyline is drawn in one compiled call.
+    """
+    for i in range(len(xs) - 1):
+        _draw_line(mask, width, height, int(xs[i]), int(ys[i]), int(xs[i + 1]), int(ys[i + 1]))
+
+
+def _decode_record_to_points(record: bytes) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Decode a channel record into a list of absolute (x,y) points:
+    Decode a channel record into absolute point coordinates, as separate xs and ys int32 arrays:
     - First 4 bytes: uint16 little-endian x0, y0
     - Remaining bytes: pairs of int8 (dx, dy) accumulated from the previous point
     """
     if len(record) < 4:
-        return []
-    x = int.from_bytes(record[0:2], 'little', signed=False)
-    y = int.from_bytes(record[2:4], 'little', signed=False)
-    points = [(x, y)]
-    i = 4
-    while i + 1 < len(record):
-        dx = int.from_bytes(record[i:i+1], 'little', signed=True)
-        dy = int.from_bytes(record[i+1:i+2], 'little', signed=True)
-        x += dx
-        y += dy
-        points.append((x, y))
-        i += 2
-    return points
-
-
-def _scanline_fill_polygon(mask: bytearray, width: int, height: int, points: List[Tuple[int, int]]) -> None:
+        empty = np.empty(0, dtype=np.int32)
+        return empty, empty
+    x0, y0 = np.frombuffer(record, dtype='<u2', count=2).tolist()
+    deltas = np.frombuffer(record, dtype=np.int8, offset=4)
+    # a trailing odd byte is not a delta pair
+    deltas = deltas[:(len(deltas) // 2) * 2].reshape(-1, 2).astype(np.int32)
+    xs = np.empty(len(deltas) + 1, dtype=np.int32)
+    ys = np.empty_like(xs)
+    xs[0] = x0
+    ys[0] = y0
+    np.cumsum(deltas[:, 0], out=xs[1:])
+    np.cumsum(deltas[:, 1], out=ys[1:])
+    xs[1:] += x0
+    ys[1:] += y0
+    return xs, ys
+
+
+def _scanline_fill_polygon(mask: np.ndarray, width: int, height: int, xs: np.ndarray, ys: np.ndarray) -> None:
     """
     Simple even-odd scanline fill for a polygon described by points.
     If polyline is not closed, it will be treated as open; closing is optional.
     """
-    if len(points) < 3:
+    if len(xs) < 3:
         return
+    px = xs.tolist()
+    py = ys.tolist()
     # Build edges
     edges = []
-    for a, b in zip(points, points[1:]):
-        (x0, y0), (x1, y1) = a, b
+    for x0, y0, x1, y1 in zip(px, py, px[1:], py[1:]):
         if y0 == y1:
             # horizontal edges can be drawn but do not contribute to scanline intersections
             _draw_line(mask, width, height, x0, y0, x1, y1)
             continue
         edges.append((x0, y0, x1, y1))
     # Optionally close polygon if endpoints match
-    if points[0] != points[-1]:
-        x0, y0 = points[-1]
-        x1, y1 = points[0]
+    if px[0] != px[-1] or py[0] != py[-1]:
+        x0, y0 = px[-1], py[-1]
+        x1, y1 = px[0], py[0]
         if y0 != y1:
             edges.append((x0, y0, x1, y1))
         _draw_line(mask, width, height, x0, y0, x1, y1)
 
-    # Fill by scanline
-    for y in range(0, height):
-        xs: List[int] = []
-        for x0, y0, x1, y1 in edges:
-            # Check if scanline intersects edge (upper-exclusive)
-            ymin = min(y0, y1)
-            ymax = max(y0, y1)
-            if y < ymin or y >= ymax:
-                continue
-            # Intersection x using linear interpolation
-            if x0 == x1:
-                x_int = x0
-            else:
-                t = (y - y0) / (y1 - y0)
-                x_int = int(round(x0 + t * (x1 - x0)))
-            xs.append(x_int)
-        xs.sort()
-        for i in range(0, len(xs) - 1, 2):
-            x_start = max(0, xs[i])
-            x_end = min(width - 1, xs[i + 1])
-            if x_end < x_start:
+    if not edges:
+        return
+    edge_arr = np.array(edges, dtype=np.int64)
+    if HAVE_NUMBA:
+        _fill_edges_aet(mask, width, height, edge_arr)
+    else:
+        _fill_edges_vectorized(mask, width, height, edge_arr)
+
+
+@njit(cache=True, boundscheck=False)
+def _fill_edges_aet(mask: np.ndarray, width: int, height: int, edges: np.ndarray) -> None:
+    """
+    Even-odd scanline fill of non-horizontal edges (rows of x0, y0, x1, y1)
+    using an active edge table: edges are sorted by their top row, enter the
+    table on that row and leave it past their bottom row, so each scanline
+    only visits the edges that cross it.
+    """
+    n = edges.shape[0]
+    ymin = np.minimum(edges[:, 1], edges[:, 3])
+    ymax = np.maximum(edges[:, 1], edges[:, 3])
+    order = np.argsort(ymin, kind='mergesort')
+    aet = np.empty(n, dtype=np.int64)
+    n_active = 0
+    next_edge = 0
+    xs = np.empty(n, dtype=np.int64)
+    y_end = min(height, ymax.max())
+    for y in range(max(0, ymin[order[0]]), y_end):
+        # add edges starting at or above this scanline
+        while next_edge < n and ymin[order[next_edge]] <= y:
+            aet[n_active] = order[next_edge]
+            n_active += 1
+            next_edge += 1
+        # drop edges that ended (upper-exclusive), intersect the rest
+        kept = 0
+        for j in range(n_active):
+            e = aet[j]
+            if ymax[e] <= y:
                 continue
-            for x in range(x_start, x_end + 1):
-                _set_pixel_bit(mask, width, height, x, y)
+            aet[kept] = e
+            x0, y0, x1, y1 = edges[e, 0], edges[e, 1], edges[e, 2], edges[e, 3]
+            # Intersection x using linear interpolation, evaluated per row
+            # rather than stepped, to keep the rounding of the reference fill
+            t = (y - y0) / (y1 - y0)
+            xs[kept] = int(round(x0 + t * (x1 - x0)))
+            kept += 1
+        n_active = kept
+        row = xs[:n_active]
+        row.sort()
+        for i in range(0, n_active - 1, 2):
+            x_start = max(0, row[i])
+            x_end = min(width - 1, row[i + 1])
+            if x_end >= x_start:
+                _fill_run(mask[y], x_start, x_end)
+
+
+def _fill_edges_vectorized(mask: np.ndarray, width: int, height: int, edges: np.ndarray) -> None:
+    """
+    Even-odd scanline fill of non-horizontal edges (rows of x0, y0, x1, y1)
+    with numpy, used when numba is not available.
+    """
+    # Fill by scanline, all rows at once: one row of the (rows, edges) grids per scanline
+    ex0, ey0, ex1, ey1 = edges.T
+    ey_min = np.minimum(ey0, ey1)
+    ey_max = np.maximum(ey0, ey1)
+    y_lo = max(0, int(ey_min.min()))
+    y_hi = min(height, int(ey_max.max()))
+    if y_hi <= y_lo:
+        return
+    rows = np.arange(y_lo, y_hi, dtype=np.int64)[:, None]
+    # Check if scanline intersects edge (upper-exclusive)
+    active = (ey_min <= rows) & (rows < ey_max)
+    # Intersection x using linear interpolation, same float ops and round-half-even as round()
+    t = (rows - ey0) / (ey1 - ey0)
+    x_int = np.rint(ex0 + t * (ex1 - ex0)).astype(np.int64)
+    # sort per row, inactive edges sink to the end
+    x_int = np.sort(np.where(active, x_int, np.iinfo(np.int64).max), axis=1)
+    count = active.sum(axis=1)
+
+    # even-odd pairs (0,1), (2,3), ... that exist in the row
+    n_pairs = x_int.shape[1] // 2
+    pair = np.arange(n_pairs)
+    x_start = np.maximum(0, x_int[:, 0:2 * n_pairs:2])
+    x_end = np.minimum(width - 1, x_int[:, 1:2 * n_pairs:2])
+    valid = (2 * pair + 1 < count[:, None]) & (x_end >= x_start)
+    if not valid.any():
+        return
+
+    # Rasterize the runs of each row: +1 at run start, -1 past run end,
+    # prefix sum along the row gives coverage, packed straight into mask rows.
+    stride = width + 1
+    row_idx = np.broadcast_to(rows - y_lo, valid.shape)[valid]
+    run_start = row_idx * stride + x_start[valid]
+    run_stop = row_idx * stride + x_end[valid] + 1
+    n_cells = (y_hi - y_lo) * stride
+    delta = np.bincount(run_start, minlength=n_cells) - np.bincount(run_stop, minlength=n_cells)
+    covered = np.cumsum(delta.reshape(y_hi - y_lo, stride)[:, :width], axis=1) > 0
+    mask[y_lo:y_hi] |= np.packbits(covered, axis=1)
 
 
 def draw_frame_to_mask(asvr: AlphaStream, frame_index: int, width: int, height: int, fill: bool = True) -> bytes:
@@ -194,40 +324,36 @@ def draw_frame_to_mask(asvr: AlphaStream, frame_index: int, width: int, height:
     Returns
     -------
     bytes
-        1-bit-per-pixel mask buffer (row-major), length ceil(width*height/8).
+        1-bit-per-pixel mask buffer (row-major, MSB-first), each row padded to
+        a whole byte: length height * ceil(width/8).
     """
     frame_data = asvr.get_frame_data(frame_index)
     header_words, records = asvr.parse_frame_data(frame_data)
 
-    buf_size = (width * height + 7) // 8
-    mask = bytearray(buf_size)
+    # rows start on a byte boundary so fills address mask[y, byte] directly
+    row_bytes = (width + 7) // 8
+    mask = np.zeros((height, row_bytes), dtype=np.uint8)
 
     for rec in records:
-        pts = _decode_record_to_points(rec)
+        xs, ys = _decode_record_to_points(rec)
+        if _draw_record_c is not None:
+            _draw_record_c(xs, ys, mask, width, height, fill)
+            continue
         # Draw polyline segments
-        for (x0, y0), (x1, y1) in zip(pts, pts[1:]):
-            _draw_line(mask, width, height, x0, y0, x1, y1)
+        _draw_polyline(mask, width, height, xs, ys)
         # Finalize by filling interior if requested
         if fill:
-            _scanline_fill_polygon(mask, width, height, pts)
+            _scanline_fill_polygon(mask, width, height, xs, ys)
 
-    return bytes(mask)
+    return mask.tobytes()
 
 
 def mask_bytes_to_image(mask_bytes: bytes, width: int, height: int) -> Image.Image:
     """
-    Convert packed 1-bit row-major mask to an 8-bit grayscale Pillow image.
-    Note: Binary uses LSB-first bit order within bytes; Pillow's '1' mode expects MSB-first.
-    To avoid bit-order mismatch, expand to 'L' (0/255) pixels.
+    Convert packed 1-bit row-major MSB-first mask to a Pillow '1' mode image.
+    The layout, including byte padding of rows, is Pillow's own, so no conversion is needed.
     """
-    total = width * height
-    pixels = bytearray(total)
-    for idx in range(total):
-        b = mask_bytes[idx >> 3]
-        bit = 1 << (idx & 7)  # LSB-first
-        pixels[idx] = 255 if (b & bit) else 0
-    img = Image.frombytes('L', (width, height), bytes(pixels))
-    return img
+    return Image.frombytes('1', (width, height), bytes(mask_bytes))
 
 
 def save_frame_png(asvr: AlphaStream, frame_index: int, width: int, height: int, out_path: str, fill: bool = True) -> None:
@@ -0,0 +1,233 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""alpha_stream_draw_c.pyx
+
+Ahead-of-time compiled rasterizer kernel for alpha_stream_draw.py.
+Draws one decoded record exactly like draw_frame_to_mask() does per record:
+- draw polyline edges via Bresenham with Liang-Barsky clipping
+- optionally close the polygon and scanline fill it (even-odd, active edge table)
+
+The work runs without the GIL, so frames can be rasterized on several threads.
+alpha_stream_draw.py uses this module when it is built and falls back to
+numba / numpy otherwise.
+
+Build in place (needs Cython >= 3 and a C compiler):
+  python setup.py build_ext --inplace
+"""
+from libc.math cimport rint
+from libc.stdlib cimport free, malloc, qsort
+
+# MSB-first, matches BIT_LOOKUP / LEFT_MASK / RIGHT_MASK in alpha_stream_draw.py
+cdef unsigned char[8] BIT_LOOKUP = [128, 64, 32, 16, 8, 4, 2, 1]
+cdef unsigned char[8] LEFT_MASK = [0xFF, 0x7F, 0x3F, 0x1F, 0x0F, 0x07, 0x03, 0x01]
+cdef unsigned char[8] RIGHT_MASK = [0x80, 0xC0, 0xE0, 0xF0, 0xF8, 0xFC, 0xFE, 0xFF]
+
+ctypedef struct Edge:
+    long x0
+    long y0
+    long x1
+    long y1
+    long ymin
+    long ymax
+
+
+cdef inline void _set_pixel_bit(unsigned char* mask, Py_ssize_t row_bytes, long width, long height,
+                                long x, long y) noexcept nogil:
+    if x < 0 or y < 0 or x >= width or y >= height:
+        return
+    mask[y * row_bytes + (x >> 3)] |= BIT_LOOKUP[x & 7]
+
+
+cdef void _draw_line(unsigned char* mask, Py_ssize_t row_bytes, long width, long height,
+                     long x0, long y0, long x1, long y1) noexcept nogil:
+    """Liang-Barsky clip to [0,width-1]x[0,height-1], then Bresenham."""
+    cdef long dx = x1 - x0
+    cdef long dy = y1 - y0
+    cdef long[4] p = [-dx, dx, -dy, dy]
+    cdef long[4] q = [x0, width - 1 - x0, y0, height - 1 - y0]
+    cdef double u1 = 0.0, u2 = 1.0, t
+    cdef int i
+    for i in range(4):
+        if p[i] == 0:
+            if q[i] < 0:
+                return
+        else:
+            t = <double>q[i] / <double>p[i]
+            if p[i] < 0:
+                if t > u2:
+                    return
+                if t > u1:
+                    u1 = t
+            else:
+                if t < u1:
+                    return
+                if t < u2:
+                    u2 = t
+    # rint rounds half to even like Python's round()
+    cdef long cx0 = <long>rint(x0 + u1 * dx)
+    cdef long cy0 = <long>rint(y0 + u1 * dy)
+    cdef long cx1 = <long>rint(x0 + u2 * dx)
+    cdef long cy1 = <long>rint(y0 + u2 * dy)
+
+    dx = cx1 - cx0 if cx1 > cx0 else cx0 - cx1
+    dy = cy1 - cy0 if cy1 > cy0 else cy0 - cy1
+    cdef long sx = 1 if cx0 < cx1 else -1
+    cdef long sy = 1 if cy0 < cy1 else -1
+    cdef long err = dx - dy
+    cdef long e2
+    while True:
+        _set_pixel_bit(mask, row_bytes, width, height, cx0, cy0)
+        if cx0 == cx1 and cy0 == cy1:
+            break
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            cx0 += sx
+        if e2 < dx:
+            err += dx
+            cy0 += sy
+
+
+cdef inline void _fill_run(unsigned char* row, long x_start, long x_end) noexcept nogil:
+    cdef long start_byte = x_start >> 3, end_byte = x_end >> 3
+    cdef long b
+    if start_byte == end_byte:
+        row[start_byte] |= LEFT_MASK[x_start & 7] & RIGHT_MASK[x_end & 7]
+        return
+    row[start_byte] |= LEFT_MASK[x_start & 7]
+    for b in range(start_byte + 1, end_byte):
+        row[b] = 0xFF
+    row[end_byte] |= RIGHT_MASK[x_end & 7]
+
+
+cdef int _cmp_edge_ymin(const void* a, const void* b) noexcept nogil:
+    cdef long ya = (<const Edge*>a).ymin
+    cdef long yb = (<const Edge*>b).ymin
+    return (ya > yb) - (ya < yb)
+
+
+cdef int _fill_edges(unsigned char* mask, Py_ssize_t row_bytes, long width, long height,
+                     Edge* edges, Py_ssize_t n) noexcept nogil:
+    """Even-odd scanline fill with an active edge table; returns -1 when out of memory."""
+    cdef Py_ssize_t* aet = <Py_ssize_t*>malloc(n * sizeof(Py_ssize_t))
+    cdef long* xs = <long*>malloc(n * sizeof(long))
+    if aet == NULL or xs == NULL:
+        free(aet)
+        free(xs)
+        return -1
+    qsort(edges, n, sizeof(Edge), _cmp_edge_ymin)
+
+    cdef long y_end = 0
+    cdef Py_ssize_t i, j, k, n_active = 0, next_edge = 0
+    for i in range(n):
+        if edges[i].ymax > y_end:
+            y_end = edges[i].ymax
+    if y_end > height:
+        y_end = height
+    cdef long y = edges[0].ymin if edges[0].ymin > 0 else 0
+    cdef long x, x_start, x_end
+    cdef double t
+    cdef Edge* e
+    while y < y_end:
+        # add edges starting at or above this scanline
+        while next_edge < n and edges[next_edge].ymin <= y:
+            aet[n_active] = next_edge
+            n_active += 1
+            next_edge += 1
+        # drop edges that ended (upper-exclusive), intersect and insertion-sort the rest
+        k = 0
+        for j in range(n_active):
+            e = &edges[aet[j]]
+            if e.ymax <= y:
+                continue
+            aet[k] = aet[j]
+            t = <double>(y - e.y0) / <double>(e.y1 - e.y0)
+            x = <long>rint(e.x0 + t * (e.x1 - e.x0))
+            i = k
+            while i > 0 and xs[i - 1] > x:
+                xs[i] = xs[i - 1]
+                i -= 1
+            xs[i] = x
+            k += 1
+        n_active = k
+        for i in range(0, n_active - 1, 2):
+            x_start = xs[i] if xs[i] > 0 else 0
+            x_end = xs[i + 1] if xs[i + 1] < width - 1 else width - 1
+            if x_end >= x_start:
+                _fill_run(mask + y * row_bytes, x_start, x_end)
+        y += 1
+
+    free(aet)
+    free(xs)
+    return 0
+
+
+cdef int _draw_record(const int* px, const int* py, Py_ssize_t n, unsigned char* mask, Py_ssize_t row_bytes,
+                      long width, long height, bint fill) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(n - 1):
+        _draw_line(mask, row_bytes, width, height, px[i], py[i], px[i + 1], py[i + 1])
+    if not fill or n < 3:
+        return 0
+
+    # at most n - 1 polyline edges plus the closing edge
+    cdef Edge* edges = <Edge*>malloc(n * sizeof(Edge))
+    if edges == NULL:
+        return -1
+    cdef Py_ssize_t n_edges = 0
+    cdef long x0, y0, x1, y1
+    for i in range(n):
+        if i < n - 1:
+            x0, y0, x1, y1 = px[i], py[i], px[i + 1], py[i + 1]
+        elif px[n - 1] != px[0] or py[n - 1] != py[0]:
+            # close the polygon
+            x0, y0, x1, y1 = px[n - 1], py[n - 1], px[0], py[0]
+            _draw_line(mask, row_bytes, width, height, x0, y0, x1, y1)
+        else:
+            break
+        # horizontal edges do not contribute to scanline intersections
+        if y0 == y1:
+            continue
+        edges[n_edges].x0 = x0
+        edges[n_edges].y0 = y0
+        edges[n_edges].x1 = x1
+        edges[n_edges].y1 = y1
+        edges[n_edges].ymin = y0 if y0 < y1 else y1
+        edges[n_edges].ymax = y1 if y0 < y1 else y0
+        n_edges += 1
+
+    cdef int rc = 0
+    if n_edges > 0:
+        rc = _fill_edges(mask, row_bytes, width, height, edges, n_edges)
+    free(edges)
+    return rc
+
+
+def draw_record(const int[::1] xs, const int[::1] ys, unsigned char[:, ::1] mask, int width, int height,
+                bint fill=True):
+    """
+    Draw the polyline of one record into mask and, if fill is set, close and
+    scanline fill it.
+
+    Parameters
+    ----------
+    xs, ys : numpy.ndarray
+        int32 point coordinates, as returned by _decode_record_to_points().
+    mask : numpy.ndarray
+        uint8 array of shape (height, ceil(width/8)), MSB-first rows.
+    width, height : int
+        Mask dimensions.
+    fill : bool
+        If True, perform scanline fill after drawing edges.
+    """
+    if xs.shape[0] != ys.shape[0]:
+        raise ValueError("xs and ys differ in length")
+    if mask.shape[0] != height or mask.shape[1] != (width + 7) // 8:
+        raise ValueError("mask shape does not match width and height")
+    cdef Py_ssize_t n = xs.shape[0]
+    if n == 0 or width <= 0 or height <= 0:
+        return
+    cdef int rc
+    with nogil:
+        rc = _draw_record(&xs[0], &ys[0], n, &mask[0, 0], mask.shape[1], width, height, fill)
+    if rc != 0:
+        raise MemoryError()
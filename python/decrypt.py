@@ -18,91 +18,159 @@ See: FILE_FORMAT_PLAINTEXT.md
 from __future__ import annotations
 
 import argparse
+import mmap
+import os
 import struct
 import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple
+from typing import BinaryIO, Deque, Iterator, List, Tuple
 
-from alpha_stream_crypto import derive_key_from_salts, decrypt
+import numpy as np
+
+from alpha_stream_crypto import derive_key_from_salts, decrypt_frames, decrypt_header, decompress_chunked
 
 HEADER_SIZE = 16
 MAGIC = b"ASVP"  # ASVR Plain
 VERSION = b"PLN1"  # plaintext v1
+# Encrypted bytes per pool task; a single small frame is cheaper than the pool round trip
+FRAME_BATCH_BYTES = 64 * 1024
+# Batches decrypted ahead of the writer when using the pool; caps the plaintext held in memory
+PIPELINE_DEPTH = 8
 
 
-def _read_file(path: Path) -> bytes:
+def _map_file(path: Path) -> mmap.mmap:
+    """
+    Map a file read-only; slicing through a memoryview of the map is zero-copy.
+    """
     with open(path, "rb") as f:
-        return f.read()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
 
-def _write_file(path: Path, data: bytes) -> None:
+@contextmanager
+def _open_output(path: Path) -> Iterator[BinaryIO]:
+    """
+    Open a temporary sibling of path for writing and move it into place once
+    the block completes, so a failed conversion leaves no truncated output.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "wb") as f:
-        f.write(data)
+    tmp_path = path.with_name(path.name + ".part")
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
 
 def _parse_sizes_table_zlib(raw: bytes) -> List[int]:
     """
     Decompress sizes table and return list of u64 little-endian sizes.
     """
-    decompressed = zlib.decompress(raw)
+    decompressed = decompress_chunked(raw)
     if len(decompressed) % 8 != 0:
         raise ValueError("Sizes table decompressed length is not a multiple of 8")
-    sizes: List[int] = []
-    for i in range(0, len(decompressed), 8):
-        sizes.append(int.from_bytes(decompressed[i:i+8], byteorder="little", signed=False))
-    return sizes
+    # sizes are consumed by Python loops downstream, so hand back plain ints
+    return np.frombuffer(decompressed, dtype="<u8").tolist()
 
 
 def _decrypt_header_and_sizes(encrypted_file: bytes, key: bytes) -> Tuple[int, bytes]:
     """
-    Decrypt entire file with key_id FFFFFFFF and extract:
+    Decrypt only the header and sizes table (key_id FFFFFFFF) and extract:
     - compressed_data_size from bytes 12..15
     - compressed sizes table bytes [16 : 16+compressed_data_size]
     """
-    # Decrypt all to avoid keystream alignment issues
-    dec = decrypt(encrypted_file, key, 0xFFFFFFFF)
-    if len(dec) < HEADER_SIZE:
-        raise ValueError("File too small for header")
+    dec = decrypt_header(encrypted_file, key)
     compressed_data_size = int.from_bytes(dec[12:16], byteorder="little", signed=False)
-    end = HEADER_SIZE + compressed_data_size
-    if len(dec) < end:
-        raise ValueError("Decrypted data shorter than header+sizes table")
-    sizes_table_compressed = dec[HEADER_SIZE:end]
+    sizes_table_compressed = dec[HEADER_SIZE:]
     return compressed_data_size, sizes_table_compressed
 
 
-def _decrypt_frame_blocks(encrypted_file: bytes, key: bytes, sizes: List[int], body_base: int) -> List[bytes]:
+def _check_frame_block(plain_block: memoryview, i: int) -> None:
     """
-    For each frame i:
-    - Slice encrypted block from input
-    - Decrypt with key_id = i
-    - Validate structure (zlib decompress length matches expected)
-    - Return plaintext blocks to write out
+    Validate the structure of plaintext frame i (zlib decompress length
+    matches expected).
     """
-    out_blocks: List[bytes] = []
+    if len(plain_block) < 4:
+        raise ValueError(f"Frame {i}: plaintext block too short")
+    expected_uncompressed_len = int.from_bytes(plain_block[0:4], byteorder="little", signed=False)
+    try:
+        payload = zlib.decompress(plain_block[4:])
+    except zlib.error as ex:
+        raise ValueError(f"Frame {i}: zlib decompress failed: {ex}")
+    if len(payload) != expected_uncompressed_len:
+        raise ValueError(
+            f"Frame {i}: decompressed length {len(payload)} != expected {expected_uncompressed_len}"
+        )
+
+
+def _decrypt_frame_batch(encrypted_file: bytes, key: bytes, sizes: List[int], offset: int, first: int) -> bytearray:
+    """
+    Decrypt the consecutive frames first, first + 1, ... starting at offset,
+    validate each one and return their plaintext blocks concatenated.
+    """
+    plain = decrypt_frames(encrypted_file, key, sizes, offset, first)
+    with memoryview(plain) as view:
+        start = 0
+        for i, size in enumerate(sizes, first):
+            _check_frame_block(view[start:start + size], i)
+            start += size
+    return plain
+
+
+def _frame_batches(sizes: List[int], body_base: int) -> Iterator[Tuple[List[int], int, int]]:
+    """
+    Group frames into contiguous runs of about FRAME_BATCH_BYTES, yielding
+    (sizes, offset, first frame index) for each run.
+    """
+    first = 0
     offset = body_base
+    batch_bytes = 0
     for i, size in enumerate(sizes):
-        start = offset
-        end = start + size
-        if end > len(encrypted_file):
-            raise ValueError(f"Frame {i}: encrypted range exceeds file length")
-        enc_block = encrypted_file[start:end]
-        plain_block = decrypt(enc_block, key, i) # plaintext, but still compressed
-        if len(plain_block) < 4:
-            raise ValueError(f"Frame {i}: plaintext block too short")
-        expected_uncompressed_len = int.from_bytes(plain_block[0:4], byteorder="little", signed=False)
-        try:
-            payload = zlib.decompress(plain_block[4:])
-        except zlib.error as ex:
-            raise ValueError(f"Frame {i}: zlib decompress failed: {ex}")
-        if len(payload) != expected_uncompressed_len:
-            raise ValueError(
-                f"Frame {i}: decompressed length {len(payload)} != expected {expected_uncompressed_len}"
-            )
-        out_blocks.append(plain_block)
-        offset = end
-    return out_blocks
+        batch_bytes += size
+        if batch_bytes >= FRAME_BATCH_BYTES:
+            yield sizes[first:i + 1], offset, first
+            offset += batch_bytes
+            first = i + 1
+            batch_bytes = 0
+    if first < len(sizes):
+        yield sizes[first:], offset, first
+
+
+def _decrypt_frame_blocks(encrypted_file: bytes, key: bytes, sizes: List[int], body_base: int) -> Iterator[bytearray]:
+    """
+    Decrypt and validate every frame block, yielding runs of plaintext
+    blocks in file order.
+
+    Frames are handed out in batches of about FRAME_BATCH_BYTES, since a
+    single small frame costs less to decrypt than a round trip through the
+    pool. With one CPU the batches are decrypted inline, one at a time, and
+    nothing overlaps. With more, pool workers decrypt and validate batches
+    while the caller writes finished ones in order; only zlib and the file
+    writes release the GIL, so the ChaCha20 setup per frame still runs one
+    thread at a time.
+    At most PIPELINE_DEPTH batches (or two per worker, if more) are in flight,
+    which applies backpressure so memory use does not grow with the file.
+    """
+    if body_base + sum(sizes) > len(encrypted_file):
+        raise ValueError("Frame blocks exceed file length")
+    batches = _frame_batches(sizes, body_base)
+    workers = os.cpu_count() or 1
+    if workers == 1:
+        for batch in batches:
+            yield _decrypt_frame_batch(encrypted_file, key, *batch)
+        return
+    depth = max(PIPELINE_DEPTH, 2 * workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: Deque[Future] = deque()
+        for batch in batches:
+            pending.append(pool.submit(_decrypt_frame_batch, encrypted_file, key, *batch))
+            if len(pending) >= depth:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def _build_plain_header(compressed_data_size: int, num_sizes_entries: int) -> bytes:
@@ -118,24 +186,18 @@ def _build_plain_header(compressed_data_size: int, num_sizes_entries: int) -> by
 
 
 def convert_to_plain(scene_id: int, version: str, base_url: str, input_path: Path, output_path: Path) -> None:
-    encrypted_file = _read_file(input_path)
     key = derive_key_from_salts(scene_id, version.encode("utf-8"), base_url.encode("utf-8"))
 
-    compressed_data_size, sizes_table_compressed = _decrypt_header_and_sizes(encrypted_file, key)
-    sizes = _parse_sizes_table_zlib(sizes_table_compressed)
-
-    body_base = HEADER_SIZE + compressed_data_size
-    frame_blocks = _decrypt_frame_blocks(encrypted_file, key, sizes, body_base)
-
-    # Assemble plaintext file
-    header = _build_plain_header(compressed_data_size, len(sizes))
-    out = bytearray()
-    out += header
-    out += sizes_table_compressed
-    for blk in frame_blocks:
-        out += blk
+    with _map_file(input_path) as encrypted_file, _open_output(output_path) as out:
+        compressed_data_size, sizes_table_compressed = _decrypt_header_and_sizes(encrypted_file, key)
+        sizes = _parse_sizes_table_zlib(sizes_table_compressed)
 
-    _write_file(output_path, bytes(out))
+        # Write plaintext file as frames come in
+        out.write(_build_plain_header(compressed_data_size, len(sizes)))
+        out.write(sizes_table_compressed)
+        body_base = HEADER_SIZE + compressed_data_size
+        for blk in _decrypt_frame_blocks(encrypted_file, key, sizes, body_base):
+            out.write(blk)
 
     # Summary
     total_frames = len(sizes)
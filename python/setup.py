@@ -0,0 +1,26 @@
+"""setup.py
+
+Builds the optional compiled rasterizer kernel (alpha_stream_draw_c.pyx).
+alpha_stream_draw.py works without it, falling back to numba or numpy.
+
+Usage:
+  pip install cython setuptools
+  python setup.py build_ext --inplace
+"""
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+extensions = [
+    Extension(
+        "alpha_stream_draw_c",
+        ["alpha_stream_draw_c.pyx"],
+        # tuned for the building machine, rebuild rather than copy the .so elsewhere;
+        # no FMA contraction, intersections must round exactly like the Python code
+        extra_compile_args=["-O3", "-march=native", "-ffp-contract=off"],
+    ),
+]
+
+setup(
+    name="alpha-stream-draw-c",
+    ext_modules=cythonize(extensions, language_level=3),
+)